@@ -5,12 +5,38 @@ This script demonstrates how HTTP requests work at a fundamental level.
 Understanding this helps you see what frameworks like Flask and FastAPI do under the hood.
 """
 
+import atexit
 import socket
 import ssl
+import sys
+from typing import Union
 from urllib.parse import urlparse
 
+import httptools
+import httpx
 
-def make_http_request(url: str, method: str = "GET", headers: dict = None, body: str = None):
+# Read the socket in 64 KiB pieces; 4 KiB reads mean many more syscalls
+RECV_BUFFER_SIZE = 64 * 1024
+
+# Building an SSL context loads the whole CA bundle, so do it once
+_SSL_CONTEXT = ssl.create_default_context()
+# Tell the server up front which protocol we speak (we only do HTTP/1.1)
+_SSL_CONTEXT.set_alpn_protocols(['http/1.1'])
+
+# TLS sessions from earlier connections, keyed by (host, port). Offering
+# one lets the server resume it with a shorter handshake.
+_TLS_SESSIONS = {}
+
+# A shared client keeps connections alive between requests, so repeated
+# calls to the same host skip the TCP (and TLS) handshake
+_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=30.0,
+)
+atexit.register(_CLIENT.close)
+
+
+def make_http_request(url: str, method: str = "GET", headers: dict = None, body: Union[str, bytes] = None):
     """
     Make a raw HTTP request without using libraries like requests.
     
@@ -23,7 +49,18 @@ def make_http_request(url: str, method: str = "GET", headers: dict = None, body:
         body: Request body (for POST/PUT)
     
     Returns:
-        The raw HTTP response
+        The raw HTTP response, as bytes
+    """
+    response, _ = _request(url, method, headers, body)
+    return response
+
+
+def _request(url: str, method: str, headers: dict, body: Union[str, bytes]):
+    """
+    Send a request over a plain socket and read the response.
+
+    Returns the raw response bytes together with the _ResponseCollector
+    that parsed them while they were being read.
     """
     # Parse the URL
     parsed = urlparse(url)
@@ -34,9 +71,12 @@ def make_http_request(url: str, method: str = "GET", headers: dict = None, body:
     # Create socket connection
     if parsed.scheme == 'https':
         # For HTTPS, we need SSL
-        context = ssl.create_default_context()
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock = context.wrap_socket(sock, server_hostname=host)
+        sock = _SSL_CONTEXT.wrap_socket(
+            sock,
+            server_hostname=host,
+            session=_TLS_SESSIONS.get((host, port))
+        )
     else:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     
@@ -44,82 +84,199 @@ def make_http_request(url: str, method: str = "GET", headers: dict = None, body:
         # Connect to server
         sock.connect((host, port))
         
-        # Build HTTP request
-        request_lines = [
-            f"{method} {path} HTTP/1.1",
-            f"Host: {host}",
-            "Connection: close",
-        ]
-        
-        # Add custom headers
-        if headers:
-            for key, value in headers.items():
-                request_lines.append(f"{key}: {value}")
+        # Send each write straight away instead of letting Nagle's
+        # algorithm hold small packets back waiting for more data
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         
-        # Add body if present
-        if body:
-            request_lines.append(f"Content-Length: {len(body)}")
-            request_lines.append("")  # Empty line before body
-            request_lines.append(body)
+        # No "Connection: close" here: the response is read until the
+        # parser has seen all of it, not until the server hangs up.
+        if not headers and not body:
+            # The common case (e.g. a plain GET) is one fixed template
+            sock.sendall(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
         else:
-            request_lines.append("")  # Empty line to end headers
-        
-        # Send request
-        request = "\r\n".join(request_lines)
-        sock.sendall(request.encode())
+            # Build HTTP request headers directly as bytes, one line at a time
+            request = bytearray(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n".encode())
+            
+            # Add custom headers
+            if headers:
+                for key, value in headers.items():
+                    request += f"{key}: {value}\r\n".encode()
+            
+            # Add body if present
+            # Content-Length counts bytes, so encode the body first
+            if isinstance(body, str):
+                body = body.encode()
+            if body:
+                request += f"Content-Length: {len(body)}\r\n".encode()
+            
+            # Headers end with an empty line
+            request += b"\r\n"
+            
+            # Send request; the body goes out as its own buffer, uncopied
+            _send_buffers(sock, [request, body] if body else [request])
         
         # Receive response
-        response = b""
-        while True:
-            chunk = sock.recv(4096)
-            if not chunk:
-                break
-            response += chunk
+        response, collector = _read_response(sock, method)
+        
+        # Remember the TLS session for the next request to this server.
+        # TLS 1.3 sends it after the handshake, so look for it only now.
+        if isinstance(sock, ssl.SSLSocket) and sock.session:
+            _TLS_SESSIONS[(host, port)] = sock.session
         
-        return response.decode('utf-8', errors='ignore')
+        return response, collector
     
     finally:
         sock.close()
 
 
-def parse_http_response(response: str):
+def _send_buffers(sock, buffers: list) -> None:
     """
-    Parse an HTTP response into its components.
-    
-    This shows you the structure of HTTP responses.
+    Send several buffers as one write, without joining them first.
+
+    sendmsg() hands the kernel a list of buffers (like writev()), so the
+    headers and a large body go out together without copying the body into
+    a new string. It may send only part of the data, so keep going until
+    everything is written. SSL sockets and Windows lack sendmsg(), so those
+    fall back to a single sendall().
     """
-    lines = response.split('\r\n')
-    
-    # First line is status line
-    status_line = lines[0]
-    protocol, status_code, status_message = status_line.split(' ', 2)
-    
-    # Headers are until first empty line
-    headers = {}
-    body_start = 0
-    for i, line in enumerate(lines[1:], 1):
-        if not line:
-            body_start = i + 1
+    if isinstance(sock, ssl.SSLSocket) or not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(buffers))
+        return
+
+    views = [memoryview(b) for b in buffers]
+    while views:
+        sent = sock.sendmsg(views)
+        # Drop the buffers that went out completely, trim a partial one
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if views:
+            views[0] = views[0][sent:]
+
+
+class _ResponseCollector:
+    """
+    Parses a response with httptools and keeps the pieces it reports.
+
+    httptools wraps llhttp, the C parser uvicorn uses. Feed it bytes as they
+    arrive; it calls these methods in order: the status line's reason
+    phrase, each header, then the body (possibly in several parts, with
+    chunked transfer encoding already undone), and finally
+    on_message_complete() once the whole response has been seen.
+    """
+
+    def __init__(self):
+        self.parser = httptools.HttpResponseParser(self)
+        self.status_message = ''
+        self.headers = {}
+        self.body_parts = []
+        self.headers_complete = False
+        self.message_complete = False
+
+    def feed(self, data) -> None:
+        self.parser.feed_data(data)
+
+    def on_status(self, status: bytes):
+        self.status_message += status.decode('latin-1')
+
+    def on_header(self, name: bytes, value: bytes):
+        self.headers[name.decode('latin-1')] = value.decode('latin-1')
+
+    def on_headers_complete(self):
+        self.headers_complete = True
+
+    def on_body(self, body: bytes):
+        self.body_parts.append(body)
+
+    def on_message_complete(self):
+        self.message_complete = True
+
+    def result(self) -> dict:
+        """Return the parsed response in the shape of parse_http_response()."""
+        return {
+            'protocol': f"HTTP/{self.parser.get_http_version()}",
+            'status_code': self.parser.get_status_code(),
+            'status_message': self.status_message,
+            'headers': self.headers,
+            'body': b''.join(self.body_parts)
+        }
+
+
+def _read_response(sock, method: str):
+    """
+    Read exactly one HTTP response from a socket.
+
+    Servers keep connections open by default in HTTP/1.1, so we can't just
+    read until the connection closes. Instead each piece is fed to the
+    parser as it arrives, and reading stops once the parser has seen a
+    complete message (or the server closes the connection).
+
+    recv_into() reuses one 64 KiB scratch buffer instead of allocating a new
+    bytes object per read, and extending a bytearray avoids re-copying
+    everything received so far on each chunk.
+
+    Returns the raw response bytes and the collector that parsed them.
+    """
+    collector = _ResponseCollector()
+    response = bytearray()
+    chunk = bytearray(RECV_BUFFER_SIZE)
+    view = memoryview(chunk)
+
+    while not collector.message_complete:
+        # A response to HEAD has headers only, even if they announce a body
+        if method == "HEAD" and collector.headers_complete:
             break
-        if ':' in line:
-            key, value = line.split(':', 1)
-            headers[key.strip()] = value.strip()
-    
-    # Body is everything after headers
-    body = '\r\n'.join(lines[body_start:])
+        n = sock.recv_into(chunk)
+        if not n:
+            break
+        response += view[:n]
+        collector.feed(view[:n])
+
+    return bytes(response), collector
+
+
+def parse_http_response(response: bytes):
+    """
+    Parse an HTTP response into its components.
     
+    This shows you the structure of HTTP responses: a status line
+    ("HTTP/1.1 200 OK"), headers up to the first empty line, then the body.
+    The body is returned as bytes; decode it only if you need text.
+    """
+    collector = _ResponseCollector()
+    collector.feed(response)
+    return collector.result()
+
+
+def fetch(url: str, method: str = "GET", headers: dict = None, body: str = None, raw: bool = False):
+    """
+    Make an HTTP request and return it in the shape of parse_http_response().
+
+    By default this goes through the shared httpx client, which reuses
+    connections. With raw=True it uses make_http_request() instead, so you
+    can see every byte that goes over the socket.
+    """
+    if raw:
+        # The response was already parsed while it was being read
+        _, collector = _request(url, method, headers, body)
+        return collector.result()
+
+    response = _CLIENT.request(method, url, headers=headers, content=body)
     return {
-        'protocol': protocol,
-        'status_code': int(status_code),
-        'status_message': status_message,
-        'headers': headers,
-        'body': body
+        'protocol': response.http_version,
+        'status_code': response.status_code,
+        'status_message': response.reason_phrase,
+        'headers': response.headers,
+        'body': response.content
     }
 
 
-def demonstrate_http():
+def demonstrate_http(raw: bool = False):
     """
     Demonstrate making HTTP requests and parsing responses.
+    
+    Args:
+        raw: Use the hand-written socket client instead of httpx
     """
     print("=" * 60)
     print("HTTP Fundamentals Demonstration")
@@ -130,15 +287,14 @@ def demonstrate_http():
     print("Example 1: Making a GET request to httpbin.org")
     print("-" * 60)
     try:
-        response = make_http_request("http://httpbin.org/get")
-        parsed = parse_http_response(response)
+        parsed = fetch("http://httpbin.org/get", raw=raw)
         
         print(f"Status: {parsed['status_code']} {parsed['status_message']}")
         print(f"Headers: {len(parsed['headers'])} headers received")
-        print(f"Body length: {len(parsed['body'])} characters")
+        print(f"Body length: {len(parsed['body'])} bytes")
         print()
-        print("Response body (first 200 chars):")
-        print(parsed['body'][:200])
+        print("Response body (first 200 bytes):")
+        print(parsed['body'][:200].decode('utf-8', errors='replace'))
         print()
     except Exception as e:
         print(f"Error: {e}")
@@ -153,13 +309,13 @@ def demonstrate_http():
         headers = {
             "Content-Type": "application/json"
         }
-        response = make_http_request(
+        parsed = fetch(
             "http://httpbin.org/post",
             method="POST",
             headers=headers,
-            body=post_data
+            body=post_data,
+            raw=raw
         )
-        parsed = parse_http_response(response)
         
         print(f"Status: {parsed['status_code']} {parsed['status_message']}")
         print(f"Content-Type: {parsed['headers'].get('Content-Type', 'N/A')}")
@@ -181,5 +337,6 @@ def demonstrate_http():
 
 
 if __name__ == "__main__":
-    demonstrate_http()
+    # Pass --raw to see the same requests made over a plain socket
+    demonstrate_http(raw="--raw" in sys.argv)
 
@@ -2,7 +2,7 @@
 Basic FastAPI Application
 
 This demonstrates core FastAPI concepts:
-- Async/await
+- async def vs def endpoints (non-blocking vs blocking work)
 - Pydantic models for validation
 - Automatic API documentation
 - Error handling
@@ -10,20 +10,84 @@ This demonstrates core FastAPI concepts:
 """
 
 from fastapi import FastAPI, HTTPException, Depends, Query
-from pydantic import BaseModel, EmailStr, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
+import os
+import re
+import sqlite3
+import threading
 
 # Create FastAPI application
+# ORJSONResponse serializes with orjson, which is much faster than the
+# standard library json module and handles datetimes natively
 app = FastAPI(
     title="FastAPI Demo",
     description="A demonstration of FastAPI features",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# In-memory data stores
-users = []
-posts = []
+# SQLite data store
+# A database file (rather than module-level lists) is shared by every
+# worker process, and its indexes keep lookups fast as the data grows.
+# It must be a file: each ":memory:" connection gets its own empty database.
+DATABASE_PATH = os.getenv("DATABASE_PATH", "fastapi_demo.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    name_ci TEXT NOT NULL,  -- casefolded name, used for search
+    email TEXT NOT NULL,
+    email_ci TEXT UNIQUE NOT NULL,  -- casefolded email, for uniqueness
+    age INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_user_id ON posts (user_id, id);
+"""
+
+USER_COLUMNS = "id, name, email, age, created_at"
+POST_COLUMNS = "id, title, content, user_id, author, created_at"
+
+_local = threading.local()
+
+
+def db() -> sqlite3.Connection:
+    """
+    Return this thread's connection to the database.
+
+    sqlite3 connections can't be shared between threads, so each thread
+    opens one the first time it needs it and keeps reusing it.
+    Autocommit mode (isolation_level=None) makes every statement its own
+    transaction.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DATABASE_PATH, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        # With WAL, synchronous=NORMAL is still safe and fsyncs far less
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+    return conn
+
+
+# WAL lets readers and a writer work at the same time; the setting is
+# stored in the database file, so it only has to be set once
+db().execute("PRAGMA journal_mode=WAL")
+db().executescript(SCHEMA)
+
+# Compiled once at import; a cheap shape check for email addresses
+EMAIL_PATTERN = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
 
 
 # ============================================================================
@@ -33,9 +97,21 @@ posts = []
 class UserCreate(BaseModel):
     """Model for creating a user."""
     name: str = Field(..., min_length=1, max_length=100)
-    email: EmailStr
+    email: str = Field(..., max_length=254)
     age: int = Field(..., ge=0, le=150)
 
+    # Input models are never modified after validation; rejecting unknown
+    # keys also spares pydantic from collecting them
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, value: str) -> str:
+        """Reject values that don't look like an email address."""
+        if not EMAIL_PATTERN.fullmatch(value):
+            raise ValueError("value is not a valid email address")
+        return value
+
 
 class UserResponse(BaseModel):
     """Model for user response."""
@@ -45,8 +121,7 @@ class UserResponse(BaseModel):
     age: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PostCreate(BaseModel):
@@ -55,6 +130,8 @@ class PostCreate(BaseModel):
     content: str = Field(..., min_length=1)
     user_id: int
 
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
 
 class PostResponse(BaseModel):
     """Model for post response."""
@@ -65,8 +142,7 @@ class PostResponse(BaseModel):
     author: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================================================
@@ -75,15 +151,21 @@ class PostResponse(BaseModel):
 
 def get_user_by_id(user_id: int) -> dict:
     """Dependency to get user by ID."""
-    user = next((u for u in users if u['id'] == user_id), None)
-    if not user:
+    row = db().execute(
+        f"SELECT {USER_COLUMNS} FROM users WHERE id = ?", (user_id,)
+    ).fetchone()
+    if not row:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return dict(row)
 
 
 # ============================================================================
 # User Endpoints
 # ============================================================================
+# `async def` endpoints run on the event loop, so they must never block.
+# root() does no I/O, so it is async. sqlite3 calls do block, so the
+# endpoints that use the database are plain `def` functions: FastAPI runs
+# those in a thread pool, keeping the event loop free for other requests.
 
 @app.get("/", tags=["General"])
 async def root():
@@ -96,8 +178,16 @@ async def root():
     }
 
 
-@app.get("/users", response_model=List[UserResponse], tags=["Users"])
-async def get_users(
+# The stored dicts already match UserResponse, so the list endpoints return
+# them as-is instead of validating every item again on the way out.
+# `responses` still documents the schema in OpenAPI.
+@app.get(
+    "/users",
+    response_model=None,
+    responses={200: {"model": List[UserResponse]}},
+    tags=["Users"]
+)
+def get_users(
     skip: int = Query(0, ge=0, description="Number of users to skip"),
     limit: int = Query(10, ge=1, le=100, description="Maximum number of users to return"),
     search: Optional[str] = Query(None, description="Search users by name")
@@ -109,36 +199,36 @@ async def get_users(
     - **limit**: Maximum number of users to return
     - **search**: Optional search term to filter by name
     """
-    filtered_users = users
-    
     # Apply search filter if provided
+    # name_ci is casefolded when the user is created, so only the search
+    # term needs casefolding here
     if search:
-        filtered_users = [
-            u for u in filtered_users
-            if search.lower() in u['name'].lower()
-        ]
-    
-    # Apply pagination
-    paginated_users = filtered_users[skip:skip + limit]
+        rows = db().execute(
+            f"SELECT {USER_COLUMNS} FROM users WHERE instr(name_ci, ?) > 0"
+            " ORDER BY id LIMIT ? OFFSET ?",
+            (search.casefold(), limit, skip)
+        )
+    else:
+        rows = db().execute(
+            f"SELECT {USER_COLUMNS} FROM users ORDER BY id LIMIT ? OFFSET ?",
+            (limit, skip)
+        )
     
-    return paginated_users
+    return ORJSONResponse([dict(row) for row in rows])
 
 
 @app.get("/users/{user_id}", response_model=UserResponse, tags=["Users"])
-async def get_user(user_id: int):
+def get_user(user_id: int):
     """
     Get a specific user by ID.
     
     - **user_id**: The ID of the user to retrieve
     """
-    user = next((u for u in users if u['id'] == user_id), None)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return get_user_by_id(user_id)
 
 
 @app.post("/users", response_model=UserResponse, status_code=201, tags=["Users"])
-async def create_user(user: UserCreate):
+def create_user(user: UserCreate):
     """
     Create a new user.
     
@@ -146,38 +236,45 @@ async def create_user(user: UserCreate):
     - **email**: User's email address (must be valid email)
     - **age**: User's age (0-150)
     """
-    # Check if email already exists
-    if any(u['email'] == user.email for u in users):
+    created_at = datetime.now()
+    
+    # The UNIQUE constraint on email_ci rejects duplicates atomically, even
+    # with several workers inserting at once. Emails are compared
+    # casefolded, so "Ann@Example.com" and "ann@example.com" clash.
+    # ON CONFLICT skips only that duplicate; other constraint errors
+    # still raise.
+    cursor = db().execute(
+        "INSERT INTO users (name, name_ci, email, email_ci, age, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (email_ci) DO NOTHING",
+        (user.name, user.name.casefold(), user.email, user.email.casefold(),
+         user.age, created_at.isoformat())
+    )
+    if not cursor.rowcount:
         raise HTTPException(
             status_code=409,
             detail="Email already exists"
         )
     
-    # Create new user
-    new_user = {
-        "id": len(users) + 1,
+    return {
+        "id": cursor.lastrowid,
         "name": user.name,
         "email": user.email,
         "age": user.age,
-        "created_at": datetime.now()
+        "created_at": created_at
     }
-    
-    users.append(new_user)
-    return new_user
 
 
 @app.delete("/users/{user_id}", status_code=204, tags=["Users"])
-async def delete_user(user_id: int):
+def delete_user(user_id: int):
     """
     Delete a user by ID.
     
     - **user_id**: The ID of the user to delete
     """
-    user = next((u for u in users if u['id'] == user_id), None)
-    if not user:
+    cursor = db().execute("DELETE FROM users WHERE id = ?", (user_id,))
+    if not cursor.rowcount:
         raise HTTPException(status_code=404, detail="User not found")
-    
-    users.remove(user)
     return None
 
 
@@ -185,8 +282,13 @@ async def delete_user(user_id: int):
 # Post Endpoints
 # ============================================================================
 
-@app.get("/posts", response_model=List[PostResponse], tags=["Posts"])
-async def get_posts(
+@app.get(
+    "/posts",
+    response_model=None,
+    responses={200: {"model": List[PostResponse]}},
+    tags=["Posts"]
+)
+def get_posts(
     user_id: Optional[int] = Query(None, description="Filter posts by user ID"),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100)
@@ -198,33 +300,39 @@ async def get_posts(
     - **skip**: Number of posts to skip
     - **limit**: Maximum number of posts to return
     """
-    filtered_posts = posts
-    
-    # Filter by user_id if provided
+    # Filter by user_id if provided (uses the posts_user_id index)
     if user_id:
-        filtered_posts = [p for p in filtered_posts if p['user_id'] == user_id]
-    
-    # Apply pagination
-    paginated_posts = filtered_posts[skip:skip + limit]
+        rows = db().execute(
+            f"SELECT {POST_COLUMNS} FROM posts WHERE user_id = ?"
+            " ORDER BY id LIMIT ? OFFSET ?",
+            (user_id, limit, skip)
+        )
+    else:
+        rows = db().execute(
+            f"SELECT {POST_COLUMNS} FROM posts ORDER BY id LIMIT ? OFFSET ?",
+            (limit, skip)
+        )
     
-    return paginated_posts
+    return ORJSONResponse([dict(row) for row in rows])
 
 
 @app.get("/posts/{post_id}", response_model=PostResponse, tags=["Posts"])
-async def get_post(post_id: int):
+def get_post(post_id: int):
     """
     Get a specific post by ID.
     
     - **post_id**: The ID of the post to retrieve
     """
-    post = next((p for p in posts if p['id'] == post_id), None)
-    if not post:
+    row = db().execute(
+        f"SELECT {POST_COLUMNS} FROM posts WHERE id = ?", (post_id,)
+    ).fetchone()
+    if not row:
         raise HTTPException(status_code=404, detail="Post not found")
-    return post
+    return dict(row)
 
 
 @app.post("/posts", response_model=PostResponse, status_code=201, tags=["Posts"])
-async def create_post(post: PostCreate, user: dict = Depends(get_user_by_id)):
+def create_post(post: PostCreate, user: dict = Depends(get_user_by_id)):
     """
     Create a new post.
     
@@ -236,7 +344,6 @@ async def create_post(post: PostCreate, user: dict = Depends(get_user_by_id)):
     """
     # User is already validated by dependency
     new_post = {
-        "id": len(posts) + 1,
         "title": post.title,
         "content": post.content,
         "user_id": post.user_id,
@@ -244,22 +351,25 @@ async def create_post(post: PostCreate, user: dict = Depends(get_user_by_id)):
         "created_at": datetime.now()
     }
     
-    posts.append(new_post)
-    return new_post
+    cursor = db().execute(
+        "INSERT INTO posts (title, content, user_id, author, created_at)"
+        " VALUES (?, ?, ?, ?, ?)",
+        (new_post['title'], new_post['content'], new_post['user_id'],
+         new_post['author'], new_post['created_at'].isoformat())
+    )
+    return {"id": cursor.lastrowid, **new_post}
 
 
 @app.delete("/posts/{post_id}", status_code=204, tags=["Posts"])
-async def delete_post(post_id: int):
+def delete_post(post_id: int):
     """
     Delete a post by ID.
     
     - **post_id**: The ID of the post to delete
     """
-    post = next((p for p in posts if p['id'] == post_id), None)
-    if not post:
+    cursor = db().execute("DELETE FROM posts WHERE id = ?", (post_id,))
+    if not cursor.rowcount:
         raise HTTPException(status_code=404, detail="Post not found")
-    
-    posts.remove(post)
     return None
 
 
@@ -278,6 +388,7 @@ async def value_error_handler(request, exc):
 # ============================================================================
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
     
     print("=" * 60)
@@ -299,5 +410,35 @@ if __name__ == "__main__":
     print("Documentation at http://localhost:8000/docs")
     print("=" * 60)
     
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    if os.getenv("DEV"):
+        # Auto-reload watches the source tree, which is handy while coding
+        # but slows startup, so only use it when DEV is set.
+        # Reload needs an import string rather than the app object.
+        uvicorn.run(
+            "basic_app:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host="0.0.0.0",
+            port=8000,
+            reload=True
+        )
+    else:
+        # uvloop and httptools (both part of uvicorn[standard]) are faster
+        # than the default asyncio loop and pure-Python h11 parser.
+        # uvloop does not support Windows, so fall back to asyncio there.
+        #
+        # WORKERS starts that many processes accepting on the same port, so
+        # requests are spread across CPU cores (one per core by default).
+        # They all share the SQLite database file.
+        # A larger listen backlog absorbs bursts of new connections.
+        uvicorn.run(
+            "basic_app:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host="0.0.0.0",
+            port=8000,
+            loop="asyncio" if sys.platform == "win32" else "uvloop",
+            http="httptools",
+            workers=int(os.getenv("WORKERS", os.cpu_count() or 1)),
+            backlog=16384,
+            log_level="warning"
+        )
 
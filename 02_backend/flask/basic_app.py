@@ -8,15 +8,56 @@ This is a simple Flask app that demonstrates core concepts:
 - Error handling
 """
 
+from itertools import count
+
+import orjson
 from flask import Flask, request, jsonify, render_template_string
+from flask.json.provider import DefaultJSONProvider
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    orjson is much faster than the standard library json module that Flask
+    uses by default. jsonify() and request.json go through the provider,
+    so the routes below don't need to change. Flask's own response() is
+    kept, so debug-mode pretty printing and the compact setting still work.
+    """
+
+    def dumps(self, obj, **kwargs):
+        # Map the json.dumps options Flask passes onto orjson flags;
+        # orjson output is always compact unless indented
+        option = 0
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(
+            obj, default=kwargs.get('default', self.default), option=option
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 # Create Flask application instance
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # In-memory data store (for demonstration)
 # In production, you'd use a database
-users = []
-posts = []
+# Dicts keyed by ID give O(1) lookups and deletes, and keep insertion order
+users = {}
+posts = {}
+
+# Secondary indexes, kept in sync with the stores above
+users_by_email = {}  # keyed by casefolded email
+posts_by_user = {}
+
+# IDs are never reused, even after a delete
+user_ids = count(1)
+post_ids = count(1)
 
 
 # ============================================================================
@@ -80,7 +121,7 @@ def get_users():
         JSON array of all users
     """
     return jsonify({
-        'users': users,
+        'users': list(users.values()),
         'count': len(users)
     })
 
@@ -112,18 +153,20 @@ def create_user():
     if not data.get('email'):
         return jsonify({'error': 'Email is required'}), 400
     
-    # Check if email already exists
-    if any(user['email'] == data['email'] for user in users):
+    # Check if email already exists (O(1) dict lookup, ignoring case)
+    email_key = data['email'].casefold()
+    if email_key in users_by_email:
         return jsonify({'error': 'Email already exists'}), 409
     
     # Create new user
     new_user = {
-        'id': len(users) + 1,
+        'id': next(user_ids),
         'name': data['name'],
         'email': data['email']
     }
     
-    users.append(new_user)
+    users[new_user['id']] = new_user
+    users_by_email[email_key] = new_user
     
     # Return created user with 201 status code
     return jsonify(new_user), 201
@@ -141,7 +184,7 @@ def get_user(user_id):
         JSON object of user, or 404 if not found
     """
     # Find user by ID
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = users.get(user_id)
     
     if user:
         return jsonify(user)
@@ -160,13 +203,11 @@ def delete_user(user_id):
     Returns:
         204 No Content on success, 404 if not found
     """
-    global users
-    
     # Find and remove user
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = users.pop(user_id, None)
     
     if user:
-        users.remove(user)
+        del users_by_email[user['email'].casefold()]
         return '', 204  # 204 No Content for successful deletion
     else:
         return jsonify({'error': 'User not found'}), 404
@@ -191,9 +232,10 @@ def get_posts():
     user_id = request.args.get('user_id', type=int)
     
     # Filter posts if user_id provided
-    filtered_posts = posts
     if user_id:
-        filtered_posts = [p for p in posts if p['user_id'] == user_id]
+        filtered_posts = posts_by_user.get(user_id, [])
+    else:
+        filtered_posts = list(posts.values())
     
     return jsonify({
         'posts': filtered_posts,
@@ -232,20 +274,21 @@ def create_post():
         return jsonify({'error': 'user_id is required'}), 400
     
     # Verify user exists
-    user = next((u for u in users if u['id'] == data['user_id']), None)
+    user = users.get(data['user_id'])
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     # Create new post
     new_post = {
-        'id': len(posts) + 1,
+        'id': next(post_ids),
         'title': data['title'],
         'content': data['content'],
         'user_id': data['user_id'],
         'author': user['name']
     }
     
-    posts.append(new_post)
+    posts[new_post['id']] = new_post
+    posts_by_user.setdefault(new_post['user_id'], []).append(new_post)
     
     return jsonify(new_post), 201
 
@@ -261,7 +304,7 @@ def get_post(post_id):
     Returns:
         JSON object of post, or 404 if not found
     """
-    post = next((p for p in posts if p['id'] == post_id), None)
+    post = posts.get(post_id)
     
     if post:
         return jsonify(post)
@@ -290,6 +333,9 @@ def internal_error(error):
 # ============================================================================
 
 if __name__ == '__main__':
+    import os
+    import sys
+    
     print("=" * 60)
     print("Flask Application Starting")
     print("=" * 60)
@@ -305,7 +351,25 @@ if __name__ == '__main__':
     print("\nServer running at http://localhost:5000")
     print("=" * 60)
     
-    # Run development server
-    # debug=True enables auto-reload and better error messages
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if os.getenv('DEV'):
+        # Run development server
+        # debug=True enables auto-reload and better error messages
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        # The development server isn't built for real traffic, so serve the
+        # app with uvicorn instead. a2wsgi's WSGIMiddleware adapts Flask's
+        # WSGI interface to ASGI and runs each request on a pool of worker
+        # threads, so slow requests don't hold up the others.
+        # This stays a single process: users and posts live in memory.
+        import uvicorn
+        from a2wsgi import WSGIMiddleware
+        
+        uvicorn.run(
+            WSGIMiddleware(app),
+            host='0.0.0.0',
+            port=5000,
+            loop='asyncio' if sys.platform == 'win32' else 'uvloop',
+            http='httptools',
+            log_level='warning'
+        )
 